@@ -1,4 +1,10 @@
+import os
 import time
+import struct
+import mmap
+import itertools
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
     
 class BBS:
 
@@ -13,9 +19,10 @@ class BBS:
 # with a small gcd((p-3)/2, (q-3)/2) (this makes the cycle length large).
 # Source: https://en.wikipedia.org/wiki/Blum_Blum_Shub
     
-    def __init__(self, p = 982451819, q = 982451863):
-        # generišemo seed uz pomoć sistemskog vremena
-        seed = int(time.time()*1000)        # time() vrati u sekundama -> pretvorimo u milisekunde
+    def __init__(self, p = 982451819, q = 982451863, seed = None):
+        # ako seed nije zadat, generišemo ga uz pomoć sistemskog vremena
+        if seed == None:
+            seed = int(time.time()*1000)    # time() vrati u sekundama -> pretvorimo u milisekunde
         seed = 4*(seed//4) + 3              # treba da bude 3 (mod 4)
         while seed % p == 0 or seed % q == 0:
             seed = seed - 4
@@ -47,7 +54,8 @@ class Dices:
         self.count = [0] * 6
         for i in range(0,self.n):
             t = self.v[i] - 1 
-            self.count[t] = self.count[t] + 1
+            if t >= 0: # 0 = kockica još nije bačena
+                self.count[t] = self.count[t] + 1
         self.rnd = BBS()
 
     def reset(self):
@@ -120,12 +128,22 @@ class Board:
     ROWS = 10 # broj redova (bez poslednjeg)
     COLS = 3 # broj kolona
     MAX_THROWS = 3 # max broj bacanja
+    tables = None # ProbabilityTables za robota (ako nisu zadate, robot simulira)
+
+    # format snimka: oznaka, verzija, format tabele, bacanje, 5 kockica, 5 oznaka zadržavanja,
+    # stanje BBS generatora (x, m), pa upisane vrednosti i opcije za svih (ROWS+1)*COLS polja
+    SNAPSHOT_MAGIC = b"JAMB"
+    SNAPSHOT_VERSION = 1
+    SNAPSHOT_STRUCT = struct.Struct("<4sBBB5B5BQQ" + str(2 * (ROWS + 1) * COLS) + "h")
+    EMPTY = -1 # prazno polje (None) u snimku
 
     def __init__(self):
         self.score=CoordinateList(self.ROWS + 1,self.COLS) # upisane vrednosti
         self.value=CoordinateList(self.ROWS + 1,self.COLS) # opcije za upisivanje vrednosti
-        self.dices=Dices()
+        self.dices=Dices([0] * 5) # nova lista (podrazumevana vrednost je deljena)
         self.format="CooList"
+        self.throw = 0 # 0 = potez nije započet
+        self.checkpoint = None # funkcija(tabla) koja se poziva posle svakog bacanja i poteza (npr. snimanje)
         # setiramo zbir kolona na 0
         for col in range(self.COLS):
             self.score.set(self.ROWS,col,0) 
@@ -242,12 +260,15 @@ class Board:
                     if self.score.get(row,col) != None:
                         continue
                     self.value.set(row,col,0)
-                    
+
+        if self.checkpoint != None:
+            self.checkpoint(self)
         return result
         
     def playRound(self):
-        self.throw = 0
-        self.dices.reset()
+        # ako je tabla vraćena iz snimka usred poteza (throw > 0), nastavljamo taj potez
+        if self.throw == 0:
+            self.dices.reset()
 
         print("Menu:")
         print("[1] Baci kocke")
@@ -261,7 +282,7 @@ class Board:
                 player = Human()
                 break
             if s == '2':
-                player = Robot()
+                player = Robot(self.tables)
                 break
             if s == 'N':
                 raise StartNewGameException
@@ -269,9 +290,12 @@ class Board:
                 raise QuitGameException
         player.playRound(self)
         self.value.clear() 
+        self.throw = 0
+        self.dices.reset()
 
     def play(self):
-        for i in range(self.ROWS * self.COLS):  # broj poteza = ROWS*COLS
+        # nastavljamo od prvog neodigranog poteza (ako je tabla vraćena iz snimka)
+        for i in range(self.countMoves(), self.ROWS * self.COLS):  # broj poteza = ROWS*COLS
             self.showBoard()
             self.playRound()
 
@@ -282,6 +306,9 @@ class Board:
                     self.score = self.score.toMatrix()
                     self.format = "Matrix"
 
+            if self.checkpoint != None:
+                self.checkpoint(self)
+
         print("Kraj igre", end="")
         self.showBoard()
         total = 0
@@ -311,6 +338,92 @@ class Board:
         cols=['D','G','R']
         rows=['1','2','3','4','5','6','K','F','P','J']
         return "" + cols[col] + rows[row]
+
+    def countMoves(self):
+        # broj popunjenih polja = broj odigranih poteza
+        k = 0
+        for row in range(self.ROWS):
+            for col in range(self.COLS):
+                if self.score.get(row,col) != None:
+                    k = k + 1
+        return k
+
+    def snapshot(self):
+        # kompaktan snimak igre u toku (bytes), vraća se sa Board.fromSnapshot
+        # snimak usred poteza (throw > 0) čuva i kockice, pa se potez nastavlja bez novog bacanja
+        cells = []
+        for table in (self.score, self.value):
+            for row in range(self.ROWS + 1):
+                for col in range(self.COLS):
+                    val = table.get(row,col)
+                    cells.append(self.EMPTY if val == None else val)
+        dices = self.dices
+        return self.SNAPSHOT_STRUCT.pack(self.SNAPSHOT_MAGIC, self.SNAPSHOT_VERSION,
+                                         1 if self.format == "Matrix" else 0,
+                                         self.throw,
+                                         *dices.v, *dices.f, dices.rnd.x, dices.rnd.m, *cells)
+
+    @classmethod
+    def fromSnapshot(cls, data):
+        if len(data) != cls.SNAPSHOT_STRUCT.size:
+            raise SnapshotException("Neispravna dužina snimka")
+        t = cls.SNAPSHOT_STRUCT.unpack(data)
+        if t[0] != cls.SNAPSHOT_MAGIC or t[1] != cls.SNAPSHOT_VERSION:
+            raise SnapshotException("Nepoznat format ili verzija snimka")
+        if t[2] not in (0, 1) or t[3] > cls.MAX_THROWS:
+            raise SnapshotException("Neispravan format tabele ili bacanje u snimku")
+        for val in t[4:9]:
+            if val > 6 or (t[3] > 0 and val == 0):
+                raise SnapshotException("Neispravna vrednost kockice u snimku")
+        for val in t[9:14]:
+            if val not in (0, 1):
+                raise SnapshotException("Neispravna oznaka zadržavanja u snimku")
+        if t[14] == 0 or t[15] <= 1:
+            raise SnapshotException("Neispravno stanje generatora u snimku")
+        for val in t[16:]:
+            if val < cls.EMPTY:
+                raise SnapshotException("Neispravna vrednost polja u snimku")
+
+        board = cls()
+        board.throw = t[3]
+        if t[2] == 1:
+            board.score = Matrix(cls.ROWS + 1, cls.COLS)
+            board.format = "Matrix"
+        else:
+            board.score = CoordinateList(cls.ROWS + 1, cls.COLS) # bez zbira kolona iz __init__ (zbir je u snimku)
+
+        dices = board.dices
+        dices.v = list(t[4:9])
+        dices.f = list(t[9:14])
+        dices.count = [0] * 6
+        for val in dices.v:
+            if val > 0: # 0 = kockica još nije bačena
+                dices.count[val - 1] = dices.count[val - 1] + 1
+        dices.rnd.x = t[14]
+        dices.rnd.m = t[15]
+
+        # polja idu redom po (row,col), pa se u CoordinateList uvek dodaju na kraj
+        k = 16
+        for table in (board.score, board.value):
+            for row in range(cls.ROWS + 1):
+                for col in range(cls.COLS):
+                    if t[k] != cls.EMPTY:
+                        table.set(row,col,t[k])
+                    k = k + 1
+        return board
+
+    def save(self, path):
+        # pišemo u privremeni fajl pa ga zamenimo, da prekid upisa ne ošteti prethodni snimak
+        data = self.snapshot()
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.fromSnapshot(f.read())
         
 class Matrix:
     def __init__(self,m,n):
@@ -394,8 +507,14 @@ class CoordinateList:
     
 class Human:
     def playRound(self,board):
+        # potez vraćen iz snimka: kockice su već bačene; ako je igrač već pustio neke kockice, odmah ih bacamo
+        resume = board.throw > 0 and 1 not in board.dices.f
         while True:
-            dices = board.rollDice()
+            if resume:
+                dices = board.dices.v
+                resume = False
+            else:
+                dices = board.rollDice()
             
             print()
             print()
@@ -419,6 +538,8 @@ class Human:
                 if ch >= 'A' and ch <= 'E':
                     k = ord(ch) - ord('A')
                     board.dices.release(k)
+            if board.checkpoint != None:
+                board.checkpoint(board)
                 
         board.showBoard()
         while True:
@@ -428,8 +549,16 @@ class Human:
                 break
 
 class Robot:
+    THRESHOLD = 0.35   # prag verovatnoće za igranje kombinacije (K, F, P, J)
+
+    def __init__(self, tables=None):
+        self.tables = tables # unapred izračunate verovatnoće (ProbabilityTables)
+
     def playRound(self,board):
-        dices = board.rollDice()        
+        if board.throw > 0:
+            dices = board.dices.v # potez vraćen iz snimka (kockice su već bačene)
+        else:
+            dices = board.rollDice()
         print()
         print("Bacanje #" + str(board.throw) + ":", end=" ")
         for d in dices:
@@ -467,7 +596,7 @@ class Robot:
             pg = row
             break
 
-        threshold = 0.35   # prag
+        threshold = self.THRESHOLD
         goal = ['1','2','3','4','5','6','K','F','P','J']        
         if pd != None and pg != None:
             if pd >= 6 and pg < 6:
@@ -538,6 +667,8 @@ class Robot:
             return
 
     def calculateProbability(self,board,goal):
+        if self.tables != None:
+            return self.tables.get(board.dices.v, goal)
         return self.simulate(board.dices.v, goal, 2, 10**3, False)
 
     def hold(self,dices,goal,debug=False):
@@ -649,6 +780,215 @@ class Robot:
 
         return k/n
 
+class ProbabilityTables:
+
+# Tabele za svih 252 multiskupova od 5 kockica i svih 10 ciljeva sa tačnim verovatnoćama
+# koje Robot.calculateProbability inače procenjuje simulacijom (ista strategija Robot.hold).
+# Tabele se prave jednom (build) i upisuju u deljenu memoriju (create) ili fajl (save);
+# radni procesi ih samo prikače (attach/open) i čitaju bez kopiranja preko memoryview.
+#
+# Raspored: zaglavlje | multiskupovi (252*5 B) | indeks (6^5 * uint16) | verovatnoće (252*10 double)
+
+    MAGIC = b"JTBL"
+    VERSION = 1
+    GOALS = "123456KFPJ"
+    ROUNDS = 2 # broj ponovnih bacanja (kao u calculateProbability)
+    HEADER = struct.Struct("<4sHH10sI")
+    N = 5 # broj kockica
+    SIZE_INDEX = 6**N
+
+    def __init__(self, buf, shm=None, mm=None):
+        self.buf = buf
+        self.shm = shm
+        self.mm = mm
+        if len(buf) < self.HEADER.size:
+            raise TablesException("Tabele su prekratke")
+        magic, version, rounds, goals, count = self.HEADER.unpack_from(buf)
+        if magic != self.MAGIC or version != self.VERSION or rounds != self.ROUNDS or goals != self.GOALS.encode():
+            raise TablesException("Zastarele ili nepoznate tabele")
+        o1, o2, o3, end = self.offsets(count)
+        if len(buf) < end:
+            raise TablesException("Tabele su prekratke")
+        self.view = memoryview(buf)
+        self.multisets = self.view[o1:o1 + count*self.N]
+        self.index = self.view[o2:o3].cast("H")
+        self.prob = self.view[o3:end].cast("d")
+        self.goal = {g: i for i, g in enumerate(self.GOALS)}
+        self.count = count
+
+    @classmethod
+    def offsets(cls, count):
+        # početak multiskupova, indeksa i verovatnoća (poravnato na 8 bajtova) i ukupna dužina
+        o1 = cls.HEADER.size
+        o2 = o1 + count*cls.N
+        o2 = (o2 + 7) // 8 * 8
+        o3 = o2 + cls.SIZE_INDEX * 2
+        o3 = (o3 + 7) // 8 * 8
+        return o1, o2, o3, o3 + count*len(cls.GOALS)*8
+
+    @classmethod
+    def key(cls, values):
+        # sortirane vrednosti kockica kao broj u osnovi 6 -> pozicija u indeksu
+        k = 0
+        for val in sorted(values):
+            k = k*6 + val - 1
+        return k
+
+    def get(self, values, goal):
+        return self.prob[self.index[self.key(values)]*len(self.GOALS) + self.goal[goal]]
+
+    @classmethod
+    def build(cls):
+        # vraća bytes sa kompletnim tabelama
+        multisets = list(itertools.combinations_with_replacement(range(1,7), cls.N))
+        count = len(multisets)
+        o1, o2, o3, end = cls.offsets(count)
+        buf = bytearray(end)
+        cls.HEADER.pack_into(buf, 0, cls.MAGIC, cls.VERSION, cls.ROUNDS, cls.GOALS.encode(), count)
+
+        # ishodi bacanja k kockica: multiskup -> verovatnoća
+        outcomes = []
+        for k in range(cls.N + 1):
+            t = {}
+            for r in itertools.product(range(1,7), repeat=k):
+                r = tuple(sorted(r))
+                t[r] = t.get(r, 0) + 1
+            outcomes.append([(r, c / 6**k) for r, c in t.items()])
+
+        robot = Robot()
+        memo = {}
+        def probability(values, goal, rounds):
+            x = (values, goal, rounds)
+            if x in memo:
+                return memo[x]
+            dices = Dices(list(values))
+            if dices.isGoalFulfilled(goal):
+                p = 1.0
+            elif rounds == 0:
+                p = 0.0
+            else:
+                robot.hold(dices, goal)
+                held = [dices.v[i] for i in range(cls.N) if dices.f[i] == 0]
+                p = 0.0
+                for r, q in outcomes[cls.N - len(held)]:
+                    p = p + q * probability(tuple(sorted(held + list(r))), goal, rounds - 1)
+            memo[x] = p
+            return p
+
+        index = memoryview(buf)[o2:o3].cast("H")
+        prob = memoryview(buf)[o3:end].cast("d")
+        for i, values in enumerate(multisets):
+            buf[o1 + i*cls.N:o1 + (i+1)*cls.N] = bytes(values)
+            index[cls.key(values)] = i
+            for j, goal in enumerate(cls.GOALS):
+                prob[i*len(cls.GOALS) + j] = probability(values, goal, cls.ROUNDS)
+        index.release()
+        prob.release()
+        return bytes(buf)
+
+    @classmethod
+    def create(cls, name=None):
+        # napravi tabele u deljenoj memoriji (ime: tables.shm.name)
+        data = cls.build()
+        shm = shared_memory.SharedMemory(name=name, create=True, size=len(data))
+        shm.buf[:len(data)] = data
+        return cls(shm.buf, shm=shm)
+
+    @classmethod
+    def attach(cls, name):
+        # radni proces prikači postojeće tabele iz deljene memorije
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False) # python 3.13+
+        except TypeError:
+            # pre 3.13 SharedMemory prijavljuje memoriju resource trackeru, koji je briše kada se proces
+            # završi; zato je ne prijavljujemo (unregister posle prijave bi obrisao i prijavu procesa
+            # koji je napravio tabele, jer spawn/fork radni procesi dele njegov tracker)
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+            finally:
+                resource_tracker.register = register
+        try:
+            return cls(shm.buf, shm=shm)
+        except TablesException:
+            shm.close()
+            raise
+
+    @classmethod
+    def save(cls, path):
+        with open(path, "wb") as f:
+            f.write(cls.build())
+
+    @classmethod
+    def open(cls, path):
+        # prikači tabele iz fajla (mmap, samo za čitanje)
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < cls.HEADER.size: # mmap ne može prazan fajl
+                raise TablesException("Tabele su prekratke")
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return cls(mm, mm=mm)
+        except TablesException:
+            mm.close()
+            raise
+
+    def close(self):
+        self.multisets.release()
+        self.index.release()
+        self.prob.release()
+        self.view.release()
+        if self.shm != None:
+            self.shm.close()
+        if self.mm != None:
+            self.mm.close()
+
+    def unlink(self):
+        # briše deljenu memoriju (poziva samo proces koji ju je napravio)
+        if self.shm != None:
+            self.shm.unlink()
+
+def initWorker(name):
+    # inicijalizacija radnog procesa (Pool initializer): prikači tabele napravljene u glavnom procesu
+    Board.tables = ProbabilityTables.attach(name)
+
+def createPool(tables, processes=None):
+    # svi radni procesi dele iste tabele (tables napravljene sa ProbabilityTables.create)
+    return multiprocessing.get_context("spawn").Pool(processes, initializer=initWorker, initargs=(tables.shm.name,))
+
+def workerStartup(name=None):
+    # priprema tabela u radnom procesu: prikačivanje (name) ili pravljenje od nule (None)
+    # vraća (sekunde, max RSS u KB)
+    import resource
+    t = time.perf_counter()
+    if name == None:
+        tables = ProbabilityTables(ProbabilityTables.build())
+    else:
+        tables = ProbabilityTables.attach(name)
+    tables.get([2,3,4,4,5], "K")
+    seconds = time.perf_counter() - t
+    tables.close()
+    return seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def measureWorkers():
+    # pokretanje novog (spawn) radnog procesa: tabele od nule naspram prikačivanja iz deljene memorije
+    # vraća {"build"/"attach": (ukupno sekundi do spremnog procesa, sekundi za tabele, max RSS u KB)}
+    tables = ProbabilityTables.create()
+    result = {}
+    try:
+        for mode, name in (("build", None), ("attach", tables.shm.name)):
+            t = time.perf_counter()
+            with multiprocessing.get_context("spawn").Pool(1) as pool:
+                seconds, rss = pool.apply(workerStartup, (name,))
+            result[mode] = (time.perf_counter() - t, seconds, rss)
+    finally:
+        tables.close()
+        tables.unlink()
+    return result
+
+SAVE_FILE = "jamb.sav" # igra u toku (izlaz sa [Q] je čuva, nastavlja se sa [R])
+TABLES_FILE = "jamb.tbl" # tabele verovatnoća za robota (prave se pri prvom pokretanju)
+
 # Pojavljuje se kada korisnik želi da započne novu igru
 class StartNewGameException(Exception): 
     pass
@@ -657,26 +997,67 @@ class StartNewGameException(Exception):
 class QuitGameException(Exception):
     pass
 
-try:
-    # simulacija montekarlo metodom
-    # print("Simulate: ", Robot().simulate([2,3,4,4,5], "K", 2, 10**2, False))
+# Pojavljuje se kada tabele verovatnoća nisu ispravne (pogrešna oznaka, verzija ili dužina)
+class TablesException(Exception):
+    pass
+
+# Pojavljuje se kada snimak igre nije ispravan (pogrešna dužina, oznaka ili verzija)
+class SnapshotException(Exception):
+    pass
+
+if __name__ == "__main__":
+    try:
+        # simulacija montekarlo metodom
+        # print("Simulate: ", Robot().simulate([2,3,4,4,5], "K", 2, 10**2, False))
+
+        # pokretanje radnog procesa: pravljenje tabela naspram prikačivanja
+        # print("Workers: ", measureWorkers())
 
-    while True:
         try:
-            b=Board()
-            b.play()
+            Board.tables = ProbabilityTables.open(TABLES_FILE)
+        except (OSError, TablesException):
+            ProbabilityTables.save(TABLES_FILE) # nema ih ili su zastarele
+            Board.tables = ProbabilityTables.open(TABLES_FILE)
+
+        while True:
+            try:
+                b=None
+                if os.path.exists(SAVE_FILE):
+                    print("Menu:")
+                    print("[R] Nastavi sačuvanu igru")
+                    print("[N] Nova igra")
+                    print("[Q] Izlaz")
+                    while True:
+                        print("Opcija: ", end="")
+                        s = input().upper()
+                        if s == 'R':
+                            try:
+                                b=Board.load(SAVE_FILE)
+                            except SnapshotException:
+                                print("Sačuvana igra nije ispravna")
+                            break
+                        if s == 'N':
+                            break
+                        if s == 'Q':
+                            raise QuitGameException
+                if b == None:
+                    b=Board()
+                b.checkpoint = lambda board: board.save(SAVE_FILE) # posle svakog bacanja i poteza
+                b.play()
+                os.remove(SAVE_FILE) # igra je završena
             
-            print("Menu:")
-            print("[N] Nova igra")
-            print("[Q] Izlaz")
-            while True:
-                print("Opcija: ", end="")
-                s = input().upper()
-                if s == 'N':
-                    raise StartNewGameException
-                if s == 'Q':
-                    raise QuitGameException
-        except StartNewGameException:
-            pass
-except QuitGameException:
-    pass
+                print("Menu:")
+                print("[N] Nova igra")
+                print("[Q] Izlaz")
+                while True:
+                    print("Opcija: ", end="")
+                    s = input().upper()
+                    if s == 'N':
+                        raise StartNewGameException
+                    if s == 'Q':
+                        raise QuitGameException
+            except StartNewGameException:
+                if os.path.exists(SAVE_FILE):
+                    os.remove(SAVE_FILE)
+    except QuitGameException:
+        pass
@@ -0,0 +1,277 @@
+import random
+
+import pytest
+
+
+def cells(board):
+    return [(board.score.get(row, col), board.value.get(row, col))
+            for row in range(board.ROWS + 1) for col in range(board.COLS)]
+
+
+def assertSameBoard(copy, board):
+    assert copy.format == board.format
+    assert copy.throw == board.throw
+    assert copy.dices.v == board.dices.v
+    assert copy.dices.f == board.dices.f
+    assert copy.dices.count == board.dices.count
+    assert cells(copy) == cells(board)
+    # isti generator -> iste sledeće vrednosti
+    assert copy.dices.rnd.nextValue() == board.dices.rnd.nextValue()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_snapshot_roundtrip_fuzz(dz1, seed):
+    rnd = random.Random(seed)
+    board = dz1.Board()
+    board.dices.rnd = dz1.BBS(seed=1000 + seed)
+    moves = rnd.randint(1, board.ROWS * board.COLS)
+    for i in range(moves):
+        # snimak između poteza
+        data = board.snapshot()
+        assertSameBoard(dz1.Board.fromSnapshot(data), board)
+
+        # snimak posle svakog bacanja (1..3) usred poteza
+        throws = rnd.randint(1, board.MAX_THROWS)
+        for j in range(throws):
+            board.rollDice()
+            data = board.snapshot()
+            copy = dz1.Board.fromSnapshot(data)
+            assert copy.snapshot() == data
+            assertSameBoard(copy, board)
+            for k in range(5):
+                if rnd.random() < 0.5:
+                    board.dices.release(k)
+
+        keys = [board.getKey(row, col) for row in range(board.ROWS) for col in range(board.COLS)
+                if board.value.get(row, col) != None]
+        assert board.submit(rnd.choice(keys)) != None
+        board.value.clear()
+        board.throw = 0
+        board.dices.reset()
+        if board.format != "Matrix" and rnd.random() < 0.1:
+            board.score = board.score.toMatrix()
+            board.format = "Matrix"
+
+    assert board.countMoves() == moves
+
+
+def test_snapshot_matrix_format(dz1):
+    board = dz1.Board()
+    board.dices.rnd = dz1.BBS(seed=7)
+    board.score.set(0, 0, 3)
+    board.score = board.score.toMatrix()
+    board.format = "Matrix"
+    board.rollDice()
+    copy = dz1.Board.fromSnapshot(board.snapshot())
+    assert isinstance(copy.score, dz1.Matrix)
+    assert copy.countMoves() == 1
+    assertSameBoard(copy, board)
+
+
+def test_snapshot_save_load(dz1, tmp_path):
+    board = dz1.Board()
+    board.dices.rnd = dz1.BBS(seed=11)
+    board.rollDice()
+    path = str(tmp_path / "jamb.sav")
+    board.save(path)
+    assertSameBoard(dz1.Board.load(path), board)
+
+
+def corrupt(data, position, value):
+    data = bytearray(data)
+    data[position] = value
+    return bytes(data)
+
+
+def test_snapshot_rejects_malformed(dz1):
+    board = dz1.Board()
+    board.dices.rnd = dz1.BBS(seed=3)
+    board.rollDice()
+    data = board.snapshot()
+
+    bad = [
+        b"",
+        data[:-1],
+        data + b"\0",
+        corrupt(data, 0, ord("X")),   # oznaka
+        corrupt(data, 4, 2),          # verzija
+        corrupt(data, 5, 5),          # format tabele
+        corrupt(data, 6, 7),          # bacanje
+        corrupt(data, 7, 9),          # kockica
+        corrupt(data, 7, 0),          # nebačena kockica usred poteza
+        corrupt(data, 12, 2),         # oznaka zadržavanja
+    ]
+    for b in bad:
+        with pytest.raises(dz1.SnapshotException):
+            dz1.Board.fromSnapshot(b)
+
+    rnd = random.Random(0)
+    for i in range(500):
+        b = corrupt(data, rnd.randrange(len(data)), rnd.randrange(256))
+        try:
+            dz1.Board.fromSnapshot(b)
+        except dz1.SnapshotException:
+            pass
+
+
+def test_interrupted_save_keeps_previous(dz1, tmp_path, monkeypatch):
+    path = str(tmp_path / "jamb.sav")
+    board = dz1.Board()
+    board.dices.rnd = dz1.BBS(seed=5)
+    board.rollDice()
+    board.save(path)
+    previous = board.snapshot()
+
+    board.dices.release(0)
+    board.rollDice()
+
+    def fail(*args):
+        raise OSError("prekid")
+
+    # prekid pre zamene (npr. proces ubijen posle upisa privremenog fajla)
+    monkeypatch.setattr(dz1.os, "replace", fail)
+    with pytest.raises(OSError):
+        board.save(path)
+    assert dz1.Board.load(path).snapshot() == previous
+
+    # greška pri pravljenju snimka
+    monkeypatch.setattr(board, "snapshot", fail)
+    with pytest.raises(OSError):
+        board.save(path)
+    assert dz1.Board.load(path).snapshot() == previous
+
+
+def test_restored_cells_are_appended(dz1):
+    board = dz1.Board()
+    board.dices.rnd = dz1.BBS(seed=9)
+    board.rollDice()
+    board.submit("R1" if board.value.get(0, 2) != None else board.getKey(0, 0))
+    copy = dz1.Board.fromSnapshot(board.snapshot())
+    assert copy.score.a == sorted(copy.score.a)
+    assert cells(copy) == cells(board)
+
+
+@pytest.fixture(scope="module")
+def tables(dz1):
+    return dz1.ProbabilityTables(dz1.ProbabilityTables.build())
+
+
+def answers(monkeypatch, *values, default=None):
+    values = list(values)
+
+    def input(*args):
+        if values:
+            return values.pop(0)
+        return default
+
+    monkeypatch.setattr("builtins.input", input)
+
+
+def record(board):
+    snapshots = []
+    board.checkpoint = lambda b: snapshots.append(b.snapshot())
+    return snapshots
+
+
+def robotGame(dz1, tables, monkeypatch, seed):
+    monkeypatch.setattr(dz1.Board, "tables", tables)
+    answers(monkeypatch, default="2")
+    board = dz1.Board()
+    board.dices.rnd = dz1.BBS(seed=seed)
+    snapshots = record(board)
+    board.play()
+    return snapshots
+
+
+def test_resume_robot_mid_turn(dz1, tables, monkeypatch):
+    snapshots = robotGame(dz1, tables, monkeypatch, 21)
+    for throw in (1, 2, 3):
+        data = [d for d in snapshots if dz1.Board.fromSnapshot(d).throw == throw][len(snapshots) // 200]
+        board = dz1.Board.fromSnapshot(data)
+        moves = board.countMoves()
+        resumed = record(board)
+        board.play()
+        after = [dz1.Board.fromSnapshot(d) for d in resumed]
+        # nastavak poteza: sledeće bacanje je throw+1 (ili upis), ne novo prvo bacanje
+        assert after[0].throw in (throw + 1, 0)
+        assert all(b.throw <= dz1.Board.MAX_THROWS for b in after)
+        assert board.countMoves() == board.ROWS * board.COLS
+        assert sum(1 for b in after if b.throw == 0) == board.ROWS * board.COLS - moves
+
+
+def test_resume_robot_between_moves(dz1, tables, monkeypatch):
+    snapshots = robotGame(dz1, tables, monkeypatch, 22)
+    data = [d for d in snapshots if dz1.Board.fromSnapshot(d).throw == 0][10]
+    board = dz1.Board.fromSnapshot(data)
+    assert board.countMoves() == 11
+    resumed = record(board)
+    board.play()
+    after = [dz1.Board.fromSnapshot(d) for d in resumed]
+    assert after[0].throw == 1
+    assert sum(1 for b in after if b.throw == 0) == board.ROWS * board.COLS - 11
+
+
+def test_resume_human_uses_saved_dice(dz1, monkeypatch):
+    board = dz1.Board()
+    board.dices.rnd = dz1.BBS(seed=31)
+    board.rollDice()
+    key = next(board.getKey(row, col) for row in range(board.ROWS) for col in range(board.COLS)
+               if board.value.get(row, col) != None)
+    row, col = next((r, c) for r in range(board.ROWS) for c in range(board.COLS) if board.getKey(r, c) == key)
+    expected = board.value.get(row, col)
+
+    copy = dz1.Board.fromSnapshot(board.snapshot())
+    resumed = record(copy)
+    answers(monkeypatch, "1", "", key, default="Q")   # čovek: bez ponovnog bacanja, upis
+    with pytest.raises(dz1.QuitGameException):
+        copy.play()
+    # jedini checkpoint je posle upisa: nije bilo novog bacanja
+    assert [dz1.Board.fromSnapshot(d).throw for d in resumed] == [0]
+    assert copy.score.get(row, col) == expected
+
+
+def test_resume_human_rolls_released_dice(dz1, monkeypatch):
+    board = dz1.Board()
+    board.dices.rnd = dz1.BBS(seed=41)
+    snapshots = record(board)
+    answers(monkeypatch, "1", "AC", default="Q")     # čovek pusti A i C, pa "padne" pre bacanja
+    monkeypatch.setattr(board, "rollDice", wrapOnce(board.rollDice))
+    with pytest.raises(Crash):
+        board.playRound()
+    assert board.dices.f == [1, 0, 1, 0, 0]
+    data = snapshots[-1]
+    saved = dz1.Board.fromSnapshot(data)
+    assert saved.dices.f == [1, 0, 1, 0, 0] and saved.throw == 1
+
+    copy = dz1.Board.fromSnapshot(data)
+    resumed = []
+
+    def checkpoint(b):
+        resumed.append(b.snapshot())
+        raise Crash
+
+    copy.checkpoint = checkpoint
+    answers(monkeypatch, "1", default="Q")
+    with pytest.raises(Crash):
+        copy.play()
+    rolled = dz1.Board.fromSnapshot(resumed[0])
+    assert rolled.throw == 2
+    for k in (1, 3, 4):
+        assert rolled.dices.v[k] == saved.dices.v[k]
+
+
+class Crash(Exception):
+    pass
+
+
+def wrapOnce(rollDice):
+    # prvo bacanje prolazi, drugo simulira pad programa
+    calls = []
+
+    def wrapper():
+        calls.append(1)
+        if len(calls) > 1:
+            raise Crash
+        return rollDice()
+
+    return wrapper
@@ -0,0 +1,84 @@
+import subprocess
+import sys
+
+import pytest
+
+
+@pytest.fixture(scope="module")
+def tables(dz1):
+    tables = dz1.ProbabilityTables.create()
+    yield tables
+    tables.close()
+    tables.unlink()
+
+
+def poolProbability(values, goal):
+    import dz1
+    return dz1.Board.tables.get(values, goal)
+
+
+def test_exact_probabilities(tables):
+    assert tables.get([2, 3, 4, 4, 5], "K") == pytest.approx(5 / 9)   # 1 - (2/3)^2
+    assert tables.get([5, 4, 4, 3, 2], "K") == tables.get([2, 3, 4, 4, 5], "K")
+    assert tables.get([3, 3, 3, 3, 3], "J") == 1.0
+    assert tables.get([1, 2, 3, 4, 5], "K") == 1.0
+    for values in ([6, 6, 6, 1, 2], [1, 2, 3, 4, 6], [6, 6, 5, 5, 1]):
+        for goal in tables.GOALS:
+            assert 0.0 <= tables.get(values, goal) <= 1.0
+
+
+@pytest.mark.parametrize("values,goal", [([2, 3, 4, 4, 5], "K"), ([6, 6, 6, 1, 2], "P"), ([6, 6, 5, 5, 1], "F")])
+def test_matches_unbiased_simulation(dz1, tables, values, goal):
+    # ista strategija kao Robot.simulate, ali jedan generator za sve pokušaje
+    robot = dz1.Robot()
+    rnd = dz1.BBS(seed=12345)
+    n = 4000
+    k = 0
+    for i in range(n):
+        dices = dz1.Dices(values.copy())
+        dices.rnd = rnd
+        for j in range(tables.ROUNDS + 1):
+            if dices.isGoalFulfilled(goal):
+                k = k + 1
+                break
+            if j < tables.ROUNDS:
+                robot.hold(dices, goal)
+                dices.roll()
+    assert k / n == pytest.approx(tables.get(values, goal), abs=0.03)
+
+
+def test_attach_survives_worker_exit(dz1, tables):
+    code = "import dz1, sys; t = dz1.ProbabilityTables.attach(sys.argv[1]); print(t.get([2,3,4,4,5], 'K')); t.close()"
+    for i in range(2):
+        out = subprocess.run([sys.executable, "-c", code, tables.shm.name], cwd=dz1.__file__.rsplit("/", 1)[0],
+                             capture_output=True, text=True, check=True)
+        assert float(out.stdout) == pytest.approx(5 / 9)
+    attached = dz1.ProbabilityTables.attach(tables.shm.name)
+    assert attached.get([2, 3, 4, 4, 5], "K") == pytest.approx(5 / 9)
+    attached.close()
+
+
+def test_pool_workers_attach(dz1, tables):
+    with dz1.createPool(tables, 2) as pool:
+        result = pool.starmap(poolProbability, [([2, 3, 4, 4, 5], "K")] * 4)
+    assert result == [pytest.approx(5 / 9)] * 4
+    attached = dz1.ProbabilityTables.attach(tables.shm.name)
+    assert attached.get([3, 3, 3, 3, 3], "J") == 1.0
+    attached.close()
+
+
+def test_file_tables(dz1, tmp_path):
+    path = str(tmp_path / "jamb.tbl")
+    dz1.ProbabilityTables.save(path)
+    tables = dz1.ProbabilityTables.open(path)
+    assert tables.get([2, 3, 4, 4, 5], "K") == pytest.approx(5 / 9)
+    tables.close()
+
+
+def test_rejects_bad_tables(dz1, tmp_path):
+    path = tmp_path / "jamb.tbl"
+    data = dz1.ProbabilityTables.build()
+    for bad in (b"", data[:10], data[:-8], b"XTBL" + data[4:], data[:4] + b"\x02" + data[5:]):
+        path.write_bytes(bad)
+        with pytest.raises(dz1.TablesException):
+            dz1.ProbabilityTables.open(str(path))